@@ -7,26 +7,63 @@ Supports grok3, grok3mini, and grok4 models
 import os
 import re
 import json
+import mmap
+import logging
+import stat
 import time
 import requests
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Generator, List, Dict, Any
-from dataclasses import asdict
+from bisect import bisect_right
+from collections import deque
+from typing import Optional, Generator, List, Dict, Any, Tuple, Deque
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException, HTTPError, Timeout
 
-from config import AgentConfig, SUPPORTED_MODELS, SUPPORTED_EXTENSIONS
+from config import AgentConfig, SUPPORTED_MODELS, SUPPORTED_EXTENSIONS, HISTORY_COMPACT_INTERVAL
 from utils import (
     setup_agent_directories, setup_logging, create_backup, load_json_file, 
-    save_json_file, load_yaml_file, save_yaml_file, get_api_key, save_api_key,
+    save_json_file, load_jsonl_file, append_jsonl_line, load_yaml_file, save_yaml_file, get_api_key, save_api_key,
     load_api_key, is_supported_file, get_search_paths, list_available_files,
     setup_colorama, print_colored
 )
 from export import export_conversation
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Both parsers accept bytes; orjson skips the intermediate str decode
+_json_loads = orjson.loads if HAS_ORJSON else json.loads
+
 # Setup colorama
 Fore, Style = setup_colorama()
 
+# Pattern for {filename} file inclusions
+_FILE_INCLUSION_RE = re.compile(r'\{([^}]+)\}')
+
+# Message roles forwarded to the API from the conversation history
+_API_ROLES = frozenset(("user", "assistant"))
+
+# Size limit for included files, and the size above which they are memory-mapped
+_MAX_INCLUDE_SIZE = 2 * 1024 * 1024  # 2MB
+_MMAP_THRESHOLD = 256 * 1024
+
+# Header comment templates for included files, by lowercase suffix
+_DEFAULT_COMMENT = "// File: {filename} ({suffix})\n"
+_SUFFIX_COMMENT = {
+    '.py': "# File: {filename} ({suffix})\n",
+    '.r': "# File: {filename} ({suffix})\n",
+    '.html': "<!-- File: {filename} ({suffix}) -->\n",
+    '.xml': "<!-- File: {filename} ({suffix}) -->\n",
+    '.css': "/* File: {filename} ({suffix}) */\n",
+    '.scss': "/* File: {filename} ({suffix}) */\n",
+    '.sass': "/* File: {filename} ({suffix}) */\n",
+    '.sql': "-- File: {filename} ({suffix})\n",
+}
+
 class GrokChatAgent:
     """Unified chat agent for Grok models with persistence and streaming support"""
 
@@ -40,6 +77,9 @@ class GrokChatAgent:
         
         # Create directory structure
         self.base_dir = setup_agent_directories(agent_id)
+        self._search_paths = get_search_paths(self.base_dir)
+        self._file_index = {}
+        self._file_index_stamps = None
         
         # Setup logging
         self.logger = setup_logging(agent_id, self.base_dir)
@@ -47,25 +87,34 @@ class GrokChatAgent:
         # Load or create configuration
         self.config = self._load_config()
         
-        # Load conversation history
+        # Load conversation history, bounded to max_history_size
         self.messages = self._load_history()
+        self._rebuild_history_indexes()
         
         # Configure API key
         self.api_key = self._get_api_key()
         
-        self.logger.info(f"Grok Chat Agent initialized: {agent_id} using {self.model_info['name']}")
+        # Reuse one HTTP session so connections are kept alive between requests
+        self._session = self._create_session()
+        
+        self.logger.info("Grok Chat Agent initialized: %s using %s", agent_id, self.model_info['name'])
 
     def _load_config(self) -> AgentConfig:
         """Load the agent's configuration from config.yaml"""
         config_file = self.base_dir / "config.yaml"
+        self._last_config_hash = None
         
         if config_file.exists():
             config_data = load_yaml_file(config_file)
             if config_data:
                 try:
-                    return AgentConfig(**config_data)
+                    config = AgentConfig(**config_data)
+                    config_dict = config.to_dict()
+                    self._refresh_config_cache(config_dict)
+                    self._last_config_hash = self._config_hash(config_dict)
+                    return config
                 except Exception as e:
-                    self.logger.error(f"Error loading config: {e}")
+                    self.logger.error("Error loading config: %s", e)
         
         # Create default config for this model
         config = AgentConfig(
@@ -76,16 +125,43 @@ class GrokChatAgent:
         return config
 
     def save_config(self, config: Optional[AgentConfig] = None):
-        """Save the agent's configuration to config.yaml"""
+        """Save the agent's configuration to config.yaml if any field changed"""
         if config is None:
             config = self.config
         
+        config_data = config.to_dict()
+        config_hash = self._config_hash(config_data)
+        if config_hash == self._last_config_hash:
+            return
+        
         config.update_timestamp()
+        config_data["updated_at"] = config.updated_at
+        self._refresh_config_cache(config_data)
+        if hasattr(self, "messages") and self.messages.maxlen != config.max_history_size:
+            self.messages = deque(self.messages, maxlen=config.max_history_size)
+            self._rebuild_history_indexes()
         config_file = self.base_dir / "config.yaml"
         
-        if not save_yaml_file(config_file, config.to_dict()):
+        if save_yaml_file(config_file, config_data):
+            self._last_config_hash = config_hash
+        else:
             self.logger.error("Failed to save configuration")
 
+    @staticmethod
+    def _config_hash(config_data: Dict[str, Any]) -> int:
+        """Hash the configuration fields, ignoring the updated_at timestamp"""
+        return hash(tuple(sorted((k, v) for k, v in config_data.items() if k != "updated_at")))
+
+    def _refresh_config_cache(self, config_data: Dict[str, Any]):
+        """Cache the config as a dict, and the fields sent with every API request"""
+        self._config_dict_cache = config_data
+        self._payload_base = {
+            "model": config_data["model"],
+            "temperature": config_data["temperature"],
+            "max_tokens": config_data["max_tokens"],
+            "stream": config_data["stream"]
+        }
+
     def _get_api_key(self) -> str:
         """Retrieve the API key from environment variables, secrets file, or prompt user"""
         # Try environment variable first
@@ -111,160 +187,280 @@ class GrokChatAgent:
         
         # Save the key
         if save_api_key(api_key, self.base_dir):
-            self.logger.info(f"API key saved for user (length: {len(api_key)})")
+            self.logger.info("API key saved for user (length: %d)", len(api_key))
         
         return api_key
 
-    def _load_history(self) -> List[Dict[str, Any]]:
-        """Load conversation history from history.json"""
+    def _create_session(self) -> requests.Session:
+        """Create the pooled HTTP session used for API requests"""
+        session = requests.Session()
+        session.headers.update({
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        })
+        session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+        return session
+
+    def _load_history(self) -> Deque[Dict[str, Any]]:
+        """Load conversation history from history.json and the history.jsonl append log"""
         history_file = self.base_dir / "history.json"
-        return load_json_file(history_file, [])
+        messages = load_json_file(history_file, [])
+        
+        # Messages appended since the last compaction
+        history_log = self.base_dir / "history.jsonl"
+        appended = load_jsonl_file(history_log)
+        if appended and self._log_already_checkpointed(messages, appended):
+            # Compaction wrote history.json but stopped before removing the log
+            self.logger.warning("Discarding %d history.jsonl records already in history.json", len(appended))
+            history_log.unlink(missing_ok=True)
+            appended = []
+        messages.extend(appended)
+        self._pending_appends = len(appended)
+        
+        # Convert ISO timestamps written by older versions to epoch seconds
+        migrated = False
+        fallback = None
+        for msg in messages:
+            value = msg.get("timestamp")
+            if isinstance(value, str):
+                try:
+                    msg["timestamp"] = datetime.fromisoformat(value).timestamp()
+                except ValueError:
+                    # Unparseable: use the checkpoint's modification time rather than fail to start
+                    if fallback is None:
+                        try:
+                            fallback = history_file.stat().st_mtime
+                        except OSError:
+                            fallback = time.time()
+                    self.logger.warning("Invalid history timestamp %r replaced with %s", value, fallback)
+                    msg["timestamp"] = fallback
+                migrated = True
+        
+        messages = deque(messages, maxlen=self.config.max_history_size)
+        if migrated:
+            self.messages = messages
+            self._save_history()
+            self.logger.info("History timestamps migrated to epoch seconds")
+        
+        return messages
+
+    @staticmethod
+    def _log_already_checkpointed(checkpoint: List[Dict[str, Any]], appended: List[Dict[str, Any]]) -> bool:
+        """Whether the append log was folded into the checkpoint by an interrupted compaction
+        
+        Compaction checkpoints the whole log, so history.json then ends with the log's
+        records (its last maxlen of them, if the history was truncated). Records carry
+        float timestamps, so a live log never matches the checkpoint tail by accident.
+        """
+        overlap = min(len(checkpoint), len(appended))
+        return overlap > 0 and checkpoint[-overlap:] == appended[-overlap:]
+
+    def _rebuild_history_indexes(self):
+        """Rebuild the structures derived from the message history"""
+        # Lowercased message contents for searching, and their joined search buffer
+        self._content_lower = deque((m["content"].lower() for m in self.messages), maxlen=self.messages.maxlen)
+        self._search_index = None
+        
+        # History projected to the API message format
+        self._api_messages = deque(
+            {"role": m["role"], "content": m["content"]} for m in self.messages if m["role"] in _API_ROLES
+        )
+        
+        # Conversation statistics, invalidated whenever the history changes
+        self._stats_cache = None
 
     def _save_history(self):
-        """Save conversation history to history.json with automatic backups"""
+        """Compact conversation history into history.json with automatic backups
+        
+        history.json is written before history.jsonl is removed; a crash in between is
+        detected on the next load by _log_already_checkpointed.
+        """
         history_file = self.base_dir / "history.json"
         
-        if not save_json_file(history_file, self.messages, create_backup_file=True):
+        if not save_json_file(history_file, list(self.messages), create_backup_file=True):
             self.logger.error("Failed to save conversation history")
+            return
+        
+        (self.base_dir / "history.jsonl").unlink(missing_ok=True)
+        self._pending_appends = 0
+
+    def _append_history(self, message: Dict[str, Any]):
+        """Append a message to history.jsonl, compacting periodically"""
+        if not append_jsonl_line(self.base_dir / "history.jsonl", message):
+            self._save_history()
+            return
+        
+        self._pending_appends += 1
+        if self._pending_appends >= HISTORY_COMPACT_INTERVAL:
+            self._save_history()
 
     def add_message(self, role: str, content: str, metadata: Optional[Dict[str, Any]] = None):
         """Add a message to the conversation history"""
         message = {
             "role": role,
             "content": content,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": time.time(),
             "metadata": metadata or {}
         }
         
+        # The bounded deques drop the oldest message once the history is full
+        if len(self.messages) == self.messages.maxlen:
+            if self.messages[0]["role"] in _API_ROLES:
+                self._api_messages.popleft()
+            self.logger.info("History truncated: oldest message removed")
+        
         self.messages.append(message)
+        if role in _API_ROLES:
+            self._api_messages.append({"role": role, "content": content})
+        self._content_lower.append(content.lower())
+        self._search_index = None
+        self._stats_cache = None
         
-        # Truncate history if necessary
-        if len(self.messages) > self.config.max_history_size:
-            removed = self.messages[:-self.config.max_history_size]
-            self.messages = self.messages[-self.config.max_history_size:]
-            self.logger.info(f"History truncated: {len(removed)} old messages removed")
+        self._append_history(message)
+
+    def _refresh_file_index(self):
+        """Index the files directly inside the search paths by name"""
+        # Adding or removing a file changes its directory's mtime, so unchanged
+        # directories mean the previous index still holds
+        stamps = []
+        for search_path in self._search_paths:
+            try:
+                stamps.append(search_path.stat().st_mtime_ns)
+            except OSError:
+                stamps.append(None)
+        if stamps == self._file_index_stamps:
+            return
+        
+        index = {}
+        for search_path in self._search_paths:
+            try:
+                with os.scandir(search_path) as entries:
+                    for entry in entries:
+                        # is_file() uses the directory entry type; only matches get stat'd
+                        if entry.name not in index and entry.is_file():
+                            index[entry.name] = entry
+            except OSError:
+                continue
+        self._file_index = index
+        self._file_index_stamps = stamps
+
+    def _locate_file(self, filename: str) -> Optional[Tuple[Path, int]]:
+        """Find an included file and its size, using the file index when possible"""
+        entry = self._file_index.get(filename)
+        if entry is not None:
+            try:
+                return Path(entry.path), entry.stat().st_size
+            except OSError:
+                pass
         
-        self._save_history()
+        # Paths with subdirectories are not in the index, nor files removed since the scan
+        for search_path in self._search_paths:
+            file_path = search_path / filename
+            try:
+                file_stat = file_path.stat()
+            except OSError:
+                continue
+            if stat.S_ISREG(file_stat.st_mode):
+                return file_path, file_stat.st_size
+        return None
 
     def _process_file_inclusions(self, content: str) -> str:
         """Replace {filename} patterns with the content of the files"""
+        if "{" not in content or _FILE_INCLUSION_RE.search(content) is None:
+            return content
+        
+        self._refresh_file_index()
+        logger = self.logger
+        locate_file = self._locate_file
+        
         def replace_file(match):
             filename = match.group(1)
-            search_paths = get_search_paths(self.base_dir)
             
-            for search_path in search_paths:
-                file_path = search_path / filename
-                if file_path.exists() and file_path.is_file():
-                    
-                    # Check if the file is supported
-                    if not is_supported_file(file_path):
-                        self.logger.warning(f"Unsupported file type: {filename}")
-                        return f"[WARNING: Unsupported file type {filename}]"
-                    
-                    try:
-                        # Check file size (limit to 2MB)
-                        max_size = 2 * 1024 * 1024  # 2MB
-                        if file_path.stat().st_size > max_size:
-                            self.logger.error(f"File {filename} too large (>2MB)")
-                            return f"[ERROR: File {filename} too large (max 2MB)]"
-                        
-                        # Try UTF-8 first
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                file_content = f.read()
-                        except UnicodeDecodeError:
-                            # Fall back to latin-1
-                            with open(file_path, 'r', encoding='latin-1') as f:
-                                file_content = f.read()
-                        
-                        # Add a header with file information
-                        file_info = f"// File: {filename} ({file_path.suffix})\n"
-                        if file_path.suffix.lower() in ['.py', '.r']:
-                            file_info = f"# File: {filename} ({file_path.suffix})\n"
-                        elif file_path.suffix.lower() in ['.html', '.xml']:
-                            file_info = f"<!-- File: {filename} ({file_path.suffix}) -->\n"
-                        elif file_path.suffix.lower() in ['.css', '.scss', '.sass']:
-                            file_info = f"/* File: {filename} ({file_path.suffix}) */\n"
-                        elif file_path.suffix.lower() in ['.sql']:
-                            file_info = f"-- File: {filename} ({file_path.suffix})\n"
-                        
-                        full_content = file_info + file_content
-                        
-                        self.logger.info(f"File included: {filename} ({len(file_content)} characters)")
-                        return full_content
-                    
-                    except Exception as e:
-                        self.logger.error(f"Error reading file {filename}: {e}")
-                        return f"[ERROR: Unable to read {filename}: {e}]"
+            found = locate_file(filename)
+            if found is None:
+                logger.warning("File not found: %s", filename)
+                return f"[ERROR: File {filename} not found]"
+            
+            file_path, file_size = found
+            suffix = file_path.suffix
+            suffix_lower = suffix.lower()
+            
+            # Check if the file is supported
+            if not is_supported_file(file_path, suffix_lower):
+                logger.warning("Unsupported file type: %s", filename)
+                return f"[WARNING: Unsupported file type {filename}]"
+            
+            try:
+                # Check file size (limit to 2MB)
+                if file_size > _MAX_INCLUDE_SIZE:
+                    logger.error("File %s too large (>2MB)", filename)
+                    return f"[ERROR: File {filename} too large (max 2MB)]"
+                
+                # Read raw bytes once, mapping larger files instead of buffering them
+                if file_size > _MMAP_THRESHOLD:
+                    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        data = mm[:]
+                else:
+                    data = file_path.read_bytes()
+                
+                # Try UTF-8 first, fall back to latin-1
+                try:
+                    file_content = data.decode('utf-8')
+                except UnicodeDecodeError:
+                    file_content = data.decode('latin-1')
+                
+                # Add a header with file information
+                template = _SUFFIX_COMMENT.get(suffix_lower, _DEFAULT_COMMENT)
+                file_info = template.format(filename=filename, suffix=suffix)
+                
+                full_content = file_info + file_content
+                
+                logger.info("File included: %s (%d characters)", filename, len(file_content))
+                return full_content
             
-            self.logger.warning(f"File not found: {filename}")
-            return f"[ERROR: File {filename} not found]"
+            except Exception as e:
+                logger.error("Error reading file %s: %s", filename, e)
+                return f"[ERROR: Unable to read {filename}: {e}]"
         
-        return re.sub(r'\{([^}]+)\}', replace_file, content)
+        return _FILE_INCLUSION_RE.sub(replace_file, content)
 
     def _build_api_payload(self, new_message: str, override_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Build the API request payload"""
         # Process file inclusions
         processed_message = self._process_file_inclusions(new_message)
         
-        # Build messages in API format
-        messages = []
-        
-        # Add system prompt if configured
-        if self.config.system_prompt:
-            messages.append({
-                "role": "system",
-                "content": self.config.system_prompt
-            })
+        # Build messages in API format: system prompt if configured, the
+        # projected conversation history, then the new user message
+        system_prompt = self.config.system_prompt
+        messages = [
+            *([{"role": "system", "content": system_prompt}] if system_prompt else []),
+            *self._api_messages,
+            {"role": "user", "content": processed_message}
+        ]
         
-        # Add conversation history
-        for msg in self.messages:
-            if msg["role"] in ["user", "assistant"]:
-                messages.append({
-                    "role": msg["role"],
-                    "content": msg["content"]
-                })
-        
-        # Add the new user message
-        messages.append({
-            "role": "user",
-            "content": processed_message
-        })
+        # Build the payload - only include parameters supported by Grok API
+        payload = {**self._payload_base, "messages": messages}
         
         # Apply any configuration overrides
-        config = asdict(self.config)
         if override_config:
-            config.update(override_config)
-        
-        # Build the payload - only include parameters supported by Grok API
-        payload = {
-            "model": config["model"],
-            "messages": messages,
-            "temperature": config["temperature"],
-            "max_tokens": config["max_tokens"],
-            "stream": config["stream"]
-        }
+            for key, value in override_config.items():
+                if key in self._payload_base:
+                    payload[key] = value
         
         return payload
 
     def _make_api_request(self, payload: Dict[str, Any]) -> requests.Response:
         """Make the API request with error and retry handling"""
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        
         timeout = self.model_info['timeout']
         max_retries = 3
         base_delay = 1
         
         for attempt in range(max_retries):
             try:
-                self.logger.info(f"Sending API request to {self.model_info['name']} (attempt {attempt + 1}/{max_retries})")
+                self.logger.info("Sending API request to %s (attempt %d/%d)", self.model_info['name'], attempt + 1, max_retries)
                 
-                response = requests.post(
+                response = self._session.post(
                     self.model_info['api_url'],
-                    headers=headers,
                     json=payload,
                     stream=payload.get("stream", True),
                     timeout=timeout
@@ -280,58 +476,63 @@ class GrokChatAgent:
                 elif response.status_code == 429:
                     # Rate limit reached - wait and retry
                     delay = base_delay * (2 ** attempt)
-                    self.logger.warning(f"Rate limit reached, retrying in {delay}s...")
+                    self.logger.warning("Rate limit reached, retrying in %ss...", delay)
                     time.sleep(delay)
                     continue
                 elif response.status_code >= 500:
                     # Server error - retry
                     delay = base_delay * (2 ** attempt)
-                    self.logger.warning(f"Server error {response.status_code}, retrying in {delay}s...")
+                    self.logger.warning("Server error %d, retrying in %ss...", response.status_code, delay)
                     time.sleep(delay)
                     continue
                 else:
                     # Log the error response body for debugging
                     try:
                         error_body = response.text
-                        self.logger.error(f"API Error {response.status_code}: {error_body}")
+                        self.logger.error("API Error %d: %s", response.status_code, error_body)
                     except:
-                        self.logger.error(f"API Error {response.status_code}: Unable to read response body")
+                        self.logger.error("API Error %d: Unable to read response body", response.status_code)
                     response.raise_for_status()
             
             except Timeout as e:
-                self.logger.warning(f"Request timed out after {timeout}s (attempt {attempt + 1}/{max_retries})")
+                self.logger.warning("Request timed out after %ss (attempt %d/%d)", timeout, attempt + 1, max_retries)
                 if attempt == max_retries - 1:
                     raise Exception(f"Request timed out after {timeout}s.") from e
                 delay = base_delay * (2 ** attempt)
-                self.logger.warning(f"Retrying in {delay}s...")
+                self.logger.warning("Retrying in %ss...", delay)
                 time.sleep(delay)
             except RequestException as e:
                 if attempt == max_retries - 1:
                     raise
                 delay = base_delay * (2 ** attempt)
-                self.logger.warning(f"Request failed ({e}), retrying in {delay}s...")
+                self.logger.warning("Request failed (%s), retrying in %ss...", e, delay)
                 time.sleep(delay)
         
         raise Exception(f"API request failed after {max_retries} attempts")
 
     def _parse_streaming_response(self, response: requests.Response) -> Generator[str, None, None]:
         """Parse the streaming response from server-side events"""
-        assistant_message = ""
+        parts = []
+        
+        # Local bindings for the per-chunk loop
+        loads = _json_loads
+        append = parts.append
+        warn = self.logger.warning
         
         try:
-            for line in response.iter_lines(decode_unicode=True):
-                if not line or line.strip() == "":
+            for line in response.iter_lines(decode_unicode=False):
+                if not line or line.strip() == b"":
                     continue
                 
                 try:
                     # Handle server-side event formats
-                    if line.startswith("data: "):
-                        data_str = line[6:].strip()
+                    if line.startswith(b"data: "):
+                        data_bytes = line[6:].strip()
                         
-                        if data_str == "[DONE]":
+                        if data_bytes == b"[DONE]":
                             break
                         
-                        data = json.loads(data_str)
+                        data = loads(data_bytes)
                         
                         # Extract content
                         choices = data.get("choices", [])
@@ -341,7 +542,7 @@ class GrokChatAgent:
                             content = delta.get("content", "")
                             
                             if content:
-                                assistant_message += content
+                                append(content)
                                 yield content
                             
                             finish_reason = choice.get("finish_reason")
@@ -349,16 +550,17 @@ class GrokChatAgent:
                                 break
                 
                 except json.JSONDecodeError as e:
-                    self.logger.warning(f"Invalid JSON in stream: {e}")
+                    warn("Invalid JSON in stream: %s", e)
                     continue
                 except Exception as e:
-                    self.logger.warning(f"Error processing stream line: {e}")
+                    warn("Error processing stream line: %s", e)
                     continue
         
         except Exception as e:
-            self.logger.error(f"Error parsing streaming response: {e}")
+            self.logger.error("Error parsing streaming response: %s", e)
         
         # Add the assistant's message to history if content was received
+        assistant_message = "".join(parts)
         if assistant_message.strip():
             self.add_message("assistant", assistant_message)
 
@@ -380,7 +582,7 @@ class GrokChatAgent:
             return "No response content received"
         
         except Exception as e:
-            self.logger.error(f"Error parsing non-streaming response: {e}")
+            self.logger.error("Error parsing non-streaming response: %s", e)
             return f"Error parsing response: {e}"
 
     def call_api(self, new_message: str, override_config: Optional[Dict[str, Any]] = None) -> Generator[str, None, None]:
@@ -392,8 +594,9 @@ class GrokChatAgent:
             # Build the API payload
             payload = self._build_api_payload(new_message, override_config)
             
-            self.logger.info(f"Calling API at {self.model_info['api_url']}")
-            self.logger.debug(f"Payload: {json.dumps(payload, indent=2)}")
+            self.logger.info("Calling API at %s", self.model_info['api_url'])
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Payload: %s", json.dumps(payload, indent=2))
             
             # Display model information to the user
             timeout_mins = self.model_info['timeout'] // 60
@@ -416,16 +619,30 @@ class GrokChatAgent:
 
     def clear_history(self):
         """Clear the conversation history"""
+        # Fold appended messages into history.json so the backup is complete
+        if self._pending_appends:
+            self._save_history()
+        
         create_backup(
             self.base_dir / "history.json",
             self.base_dir / "backups"
         )
         self.messages.clear()
+        self._content_lower.clear()
+        self._api_messages.clear()
+        self._search_index = None
+        self._stats_cache = None
         self._save_history()
         self.logger.info("Conversation history cleared")
 
     def get_statistics(self) -> Dict[str, Any]:
-        """Get conversation statistics"""
+        """Get conversation statistics, recomputed only after the history changes"""
+        if self._stats_cache is None:
+            self._stats_cache = self._compute_statistics()
+        return dict(self._stats_cache)
+
+    def _compute_statistics(self) -> Dict[str, Any]:
+        """Compute conversation statistics in a single pass over the history"""
         if not self.messages:
             return {
                 "total_messages": 0,
@@ -438,20 +655,24 @@ class GrokChatAgent:
                 "conversation_duration": None
             }
         
-        user_msgs = [m for m in self.messages if m["role"] == "user"]
-        assistant_msgs = [m for m in self.messages if m["role"] == "assistant"]
-        
-        total_chars = sum(len(m["content"]) for m in self.messages)
-        avg_length = total_chars // len(self.messages) if self.messages else 0
-        
-        first_time = datetime.fromisoformat(self.messages[0]["timestamp"])
-        last_time = datetime.fromisoformat(self.messages[-1]["timestamp"])
+        user_msgs = assistant_msgs = total_chars = 0
+        for m in self.messages:
+            total_chars += len(m["content"])
+            role = m["role"]
+            if role == "user":
+                user_msgs += 1
+            elif role == "assistant":
+                assistant_msgs += 1
+        avg_length = total_chars // len(self.messages)
+        
+        first_time = datetime.fromtimestamp(self.messages[0]["timestamp"])
+        last_time = datetime.fromtimestamp(self.messages[-1]["timestamp"])
         duration = last_time - first_time
         
         return {
             "total_messages": len(self.messages),
-            "user_messages": len(user_msgs),
-            "assistant_messages": len(assistant_msgs),
+            "user_messages": user_msgs,
+            "assistant_messages": assistant_msgs,
             "total_characters": total_chars,
             "average_message_length": avg_length,
             "first_message": first_time.strftime("%Y-%m-%d %H:%M:%S"),
@@ -467,34 +688,55 @@ class GrokChatAgent:
         filepath = export_conversation(
             agent_id=self.agent_id,
             model_name=self.model_info['name'],
-            messages=self.messages,
-            config=asdict(self.config),
+            messages=list(self.messages),
+            config=dict(self._config_dict_cache),
             statistics=self.get_statistics(),
             export_dir=export_dir,
             format_type=format_type
         )
         
-        self.logger.info(f"Conversation exported to {filepath}")
+        self.logger.info("Conversation exported to %s", filepath)
         return filepath
 
     def search_history(self, term: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Search the conversation history for a term"""
         results = []
         term_lower = term.lower()
-        
-        for i, msg in enumerate(self.messages):
-            if term_lower in msg["content"].lower():
-                results.append({
-                    "index": i,
-                    "message": msg,
-                    "preview": msg["content"][:100] + "..." if len(msg["content"]) > 100 else msg["content"]
-                })
+        buffer, offsets = self._get_search_index()
+        if not offsets:
+            return results
+        
+        # Scan the joined buffer, jumping to the next message after each hit
+        find = buffer.find
+        messages = self.messages
+        last = len(offsets) - 1
+        pos = find(term_lower)
+        while pos != -1:
+            i = bisect_right(offsets, pos) - 1
+            msg = messages[i]
+            results.append({
+                "index": i,
+                "message": msg,
+                "preview": msg["content"][:100] + "..." if len(msg["content"]) > 100 else msg["content"]
+            })
             
-            if len(results) >= limit:
+            if len(results) >= limit or i == last:
                 break
+            pos = find(term_lower, offsets[i + 1])
         
         return results
 
+    def _get_search_index(self) -> Tuple[str, List[int]]:
+        """Return the lowercased history joined into one buffer and each message's start offset"""
+        if self._search_index is None:
+            offsets = []
+            position = 0
+            for content_lower in self._content_lower:
+                offsets.append(position)
+                position += len(content_lower) + 1
+            self._search_index = ("\0".join(self._content_lower), offsets)
+        return self._search_index
+
     def list_files(self) -> List[str]:
         """List available files for inclusion"""
         return list_available_files(self.base_dir)
\ No newline at end of file
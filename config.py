@@ -32,8 +32,11 @@ SUPPORTED_MODELS = {
     }
 }
 
+# Number of messages appended to history.jsonl before it is compacted into history.json
+HISTORY_COMPACT_INTERVAL = 100
+
 # Supported file extensions for inclusion
-SUPPORTED_EXTENSIONS = {
+SUPPORTED_EXTENSIONS = frozenset({
     # Programming languages
     '.py', '.r', '.js', '.ts', '.jsx', '.tsx', '.java', '.c', '.cpp', '.cc', '.cxx',
     '.h', '.hpp', '.cs', '.php', '.rb', '.go', '.rs', '.swift', '.kt', '.scala',
@@ -64,7 +67,7 @@ SUPPORTED_EXTENSIONS = {
     # Other useful formats
     '.editorconfig', '.gitignore', '.gitattributes', '.dockerignore', '.eslintrc',
     '.prettierrc', '.babelrc', '.webpack', '.rollup', '.vite', '.parcel'
-}
+})
 
 @dataclass
 class AgentConfig:
@@ -104,12 +107,9 @@ class AgentConfig:
 
     def validate(self) -> bool:
         """Validate configuration parameters"""
-        if not (0.0 <= self.temperature <= 2.0):
-            return False
-        if self.max_tokens is not None and self.max_tokens <= 0:
-            return False
-        if self.max_history_size <= 0:
-            return False
-        if not (0.0 <= self.top_p <= 1.0):
-            return False
-        return True
\ No newline at end of file
+        return (
+            0.0 <= self.temperature <= 2.0
+            and (self.max_tokens is None or self.max_tokens > 0)
+            and self.max_history_size > 0
+            and 0.0 <= self.top_p <= 1.0
+        )
\ No newline at end of file
@@ -3,149 +3,62 @@
 Multi-format conversation export functionality (JSON/TXT/MD/HTML)
 """
 
+import re
+import html
 import json
+from itertools import count
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from dataclasses import asdict
 
-def export_conversation(
-    agent_id: str,
-    model_name: str,
-    messages: List[Dict[str, Any]], 
-    config: Dict[str, Any],
-    statistics: Dict[str, Any],
-    export_dir: Path, 
-    format_type: str
-) -> str:
-    """Export the conversation in the specified format"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    if format_type == "json":
-        return _export_json(agent_id, model_name, messages, config, statistics, export_dir, timestamp)
-    elif format_type == "txt":
-        return _export_txt(agent_id, model_name, messages, export_dir, timestamp)
-    elif format_type == "md":
-        return _export_markdown(agent_id, model_name, messages, export_dir, timestamp)
-    elif format_type == "html":
-        return _export_html(agent_id, model_name, messages, export_dir, timestamp)
-    else:
-        raise ValueError(f"Unsupported export format: {format_type}")
+from utils import format_timestamp
 
-def _export_json(
-    agent_id: str,
-    model_name: str, 
-    messages: List[Dict[str, Any]], 
-    config: Dict[str, Any],
-    statistics: Dict[str, Any],
-    export_dir: Path, 
-    timestamp: str
-) -> str:
-    """Export conversation to JSON format"""
-    filename = f"conversation_{timestamp}.json"
-    filepath = export_dir / filename
-    
-    export_data = {
-        "agent_id": agent_id,
-        "model": model_name,
-        "exported_at": datetime.now().isoformat(),
-        "config": config,
-        "messages": messages,
-        "statistics": statistics
-    }
-    
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(export_data, f, indent=2, ensure_ascii=False)
-    
-    return str(filepath)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
-def _export_txt(
-    agent_id: str,
-    model_name: str,
-    messages: List[Dict[str, Any]], 
-    export_dir: Path, 
-    timestamp: str
-) -> str:
-    """Export conversation to plain text format"""
-    filename = f"conversation_{timestamp}.txt"
-    filepath = export_dir / filename
-    
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(f"Conversation Export - Grok Multi-Model Chat Agent\n")
-        f.write(f"Agent ID: {agent_id}\n")
-        f.write(f"Model: {model_name}\n")
-        f.write(f"Exported at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write("=" * 60 + "\n\n")
-        
-        for msg in messages:
-            if msg.get("role") in ["user", "assistant"]:
-                timestamp_str = datetime.fromisoformat(msg["timestamp"]).strftime("%Y-%m-%d %H:%M:%S")
-                f.write(f"[{timestamp_str}] {msg['role'].upper()}:\n")
-                f.write(f"{msg['content']}\n\n")
-    
-    return str(filepath)
+# Message roles included in text exports
+_VISIBLE_ROLES = frozenset(("user", "assistant"))
 
-def _export_markdown(
-    agent_id: str,
-    model_name: str,
-    messages: List[Dict[str, Any]], 
-    export_dir: Path, 
-    timestamp: str
-) -> str:
-    """Export conversation to Markdown format"""
-    filename = f"conversation_{timestamp}.md"
-    filepath = export_dir / filename
-    
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(f"# Conversation - Grok Multi-Model Chat Agent\n\n")
-        f.write(f"**Agent ID:** {agent_id}  \n")
-        f.write(f"**Model:** {model_name}  \n")
-        f.write(f"**Exported at:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}  \n\n")
-        
-        for msg in messages:
-            if msg.get("role") in ["user", "assistant"]:
-                timestamp_str = datetime.fromisoformat(msg["timestamp"]).strftime("%Y-%m-%d %H:%M:%S")
-                role_emoji = "🧑" if msg["role"] == "user" else "🤖"
-                f.write(f"## {role_emoji} {msg['role'].title()} - {timestamp_str}\n\n")
-                f.write(f"{msg['content']}\n\n")
-    
-    return str(filepath)
+# Markdown code blocks and inline code, applied to escaped HTML content
+_CODE_BLOCK_RE = re.compile(r"```(.*?)```", re.S)
+_INLINE_CODE_RE = re.compile(r"`([^`]+)`")
 
-def _export_html(
-    agent_id: str,
-    model_name: str,
-    messages: List[Dict[str, Any]], 
-    export_dir: Path, 
-    timestamp: str
-) -> str:
-    """Export conversation to HTML format"""
-    filename = f"conversation_{timestamp}.html"
-    filepath = export_dir / filename
-    
-    # HTML template with styling
-    html_template = f"""<!DOCTYPE html>
+# Per-process sequence appended to export filenames so same-second exports don't collide
+_export_seq = count()
+
+# Buffer size for text exports, written message by message
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# Static and templated pieces of the HTML export page
+_HTML_HEAD = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Conversation - {model_name} - {agent_id}</title>
-    <style>
-        * {{
+"""
+
+_HTML_STYLE = """    <style>
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
         
-        body {{
+        body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             line-height: 1.6;
             color: #333;
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             min-height: 100vh;
             padding: 20px;
-        }}
+        }
         
-        .container {{
+        .container {
             max-width: 900px;
             margin: 0 auto;
             background: rgba(255, 255, 255, 0.95);
@@ -153,58 +66,58 @@ def _export_html(
             box-shadow: 0 20px 40px rgba(0, 0, 0, 0.1);
             backdrop-filter: blur(10px);
             overflow: hidden;
-        }}
+        }
         
-        .header {{
+        .header {
             background: linear-gradient(135deg, #4f46e5 0%, #7c3aed 100%);
             color: white;
             padding: 40px 30px;
             text-align: center;
-        }}
+        }
         
-        .header h1 {{
+        .header h1 {
             font-size: 2.5em;
             margin-bottom: 10px;
             font-weight: 700;
-        }}
+        }
         
-        .header p {{
+        .header p {
             font-size: 1.1em;
             opacity: 0.9;
             margin: 5px 0;
-        }}
+        }
         
-        .conversation {{
+        .conversation {
             padding: 30px;
             max-height: 70vh;
             overflow-y: auto;
-        }}
+        }
         
-        .message {{
+        .message {
             margin-bottom: 25px;
             animation: fadeInUp 0.5s ease-out;
-        }}
+        }
         
-        @keyframes fadeInUp {{
-            from {{
+        @keyframes fadeInUp {
+            from {
                 opacity: 0;
                 transform: translateY(20px);
-            }}
-            to {{
+            }
+            to {
                 opacity: 1;
                 transform: translateY(0);
-            }}
-        }}
+            }
+        }
         
-        .message.user {{
+        .message.user {
             text-align: right;
-        }}
+        }
         
-        .message.assistant {{
+        .message.assistant {
             text-align: left;
-        }}
+        }
         
-        .message-content {{
+        .message-content {
             display: inline-block;
             max-width: 85%;
             padding: 15px 20px;
@@ -213,58 +126,58 @@ def _export_html(
             line-height: 1.5;
             position: relative;
             word-wrap: break-word;
-        }}
+        }
         
-        .user .message-content {{
+        .user .message-content {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             border-bottom-right-radius: 5px;
-        }}
+        }
         
-        .assistant .message-content {{
+        .assistant .message-content {
             background: #f8f9fa;
             color: #2d3748;
             border: 1px solid #e2e8f0;
             border-bottom-left-radius: 5px;
-        }}
+        }
         
-        .timestamp {{
+        .timestamp {
             font-size: 0.85em;
             color: #718096;
             margin: 5px 15px;
             font-style: italic;
-        }}
+        }
         
-        .message-content pre {{
+        .message-content pre {
             background: rgba(0, 0, 0, 0.05);
             padding: 10px;
             border-radius: 8px;
             margin: 10px 0;
             overflow-x: auto;
             font-size: 0.9em;
-        }}
+        }
         
-        .message-content code {{
+        .message-content code {
             background: rgba(0, 0, 0, 0.05);
             padding: 2px 6px;
             border-radius: 4px;
             font-size: 0.9em;
-        }}
+        }
         
         .user .message-content pre,
-        .user .message-content code {{
+        .user .message-content code {
             background: rgba(255, 255, 255, 0.2);
-        }}
+        }
         
-        .footer {{
+        .footer {
             background: #f7fafc;
             padding: 20px 30px;
             text-align: center;
             color: #718096;
             border-top: 1px solid #e2e8f0;
-        }}
+        }
         
-        .scroll-indicator {{
+        .scroll-indicator {
             position: fixed;
             top: 0;
             left: 0;
@@ -274,122 +187,275 @@ def _export_html(
             transform-origin: left;
             transform: scaleX(0);
             transition: transform 0.3s ease;
-        }}
+        }
         
         /* Scrollbar styling */
-        .conversation::-webkit-scrollbar {{
+        .conversation::-webkit-scrollbar {
             width: 8px;
-        }}
+        }
         
-        .conversation::-webkit-scrollbar-track {{
+        .conversation::-webkit-scrollbar-track {
             background: #f1f1f1;
             border-radius: 4px;
-        }}
+        }
         
-        .conversation::-webkit-scrollbar-thumb {{
+        .conversation::-webkit-scrollbar-thumb {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             border-radius: 4px;
-        }}
+        }
         
-        .conversation::-webkit-scrollbar-thumb:hover {{
+        .conversation::-webkit-scrollbar-thumb:hover {
             background: linear-gradient(135deg, #5a67d8 0%, #6b46c1 100%);
-        }}
+        }
         
         /* Responsive design */
-        @media (max-width: 768px) {{
-            body {{
+        @media (max-width: 768px) {
+            body {
                 padding: 10px;
-            }}
+            }
             
-            .container {{
+            .container {
                 border-radius: 15px;
-            }}
+            }
             
-            .header {{
+            .header {
                 padding: 25px 20px;
-            }}
+            }
             
-            .header h1 {{
+            .header h1 {
                 font-size: 2em;
-            }}
+            }
             
-            .conversation {{
+            .conversation {
                 padding: 20px;
-            }}
+            }
             
-            .message-content {{
+            .message-content {
                 max-width: 95%;
                 padding: 12px 16px;
-            }}
-        }}
+            }
+        }
     </style>
 </head>
 <body>
     <div class="scroll-indicator"></div>
     <div class="container">
-        <div class="header">
+"""
+
+_HTML_HEADER = """        <div class="header">
             <h1>🤖 Grok Multi-Model Chat</h1>
             <p><strong>Agent:</strong> {agent_id}</p>
             <p><strong>Model:</strong> {model_name}</p>
-            <p><strong>Exported:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+            <p><strong>Exported:</strong> {exported_at}</p>
         </div>
         
         <div class="conversation">"""
-    
-    # Add messages
-    for msg in messages:
-        if msg.get("role") in ["user", "assistant"]:
-            timestamp_str = datetime.fromisoformat(msg["timestamp"]).strftime("%Y-%m-%d %H:%M:%S")
-            role = msg["role"]
-            content = msg["content"].replace("\n", "<br>").replace("```", "<pre>").replace("</pre>", "</pre>")
-            
-            # Simple code block formatting
-            content = content.replace("`", "<code>").replace("</code>", "</code>")
-            
-            html_template += f"""
-            <div class="message {role}">
-                <div class="timestamp">{timestamp_str}</div>
-                <div class="message-content">{content}</div>
-            </div>"""
-    
-    # Close HTML
-    html_template += f"""
+
+_HTML_FOOTER = """
         </div>
         
         <div class="footer">
-            <p>Generated by Grok Multi-Model Chat Agent | Total Messages: {len([m for m in messages if m.get('role') in ['user', 'assistant']])}</p>
+            <p>Generated by Grok Multi-Model Chat Agent | Total Messages: {total_messages}</p>
         </div>
     </div>
     
-    <script>
+"""
+
+_HTML_SCRIPT = """    <script>
         // Scroll progress indicator
-        function updateScrollProgress() {{
+        function updateScrollProgress() {
             const conversation = document.querySelector('.conversation');
             const scrollIndicator = document.querySelector('.scroll-indicator');
             const scrollPercent = (conversation.scrollTop / (conversation.scrollHeight - conversation.clientHeight)) * 100;
-            scrollIndicator.style.transform = `scaleX(${{scrollPercent / 100}})`;
-        }}
+            scrollIndicator.style.transform = `scaleX(${scrollPercent / 100})`;
+        }
         
         document.querySelector('.conversation').addEventListener('scroll', updateScrollProgress);
         
         // Auto-scroll to bottom on load
-        window.addEventListener('load', function() {{
+        window.addEventListener('load', function() {
             const conversation = document.querySelector('.conversation');
             conversation.scrollTop = conversation.scrollHeight;
-        }});
+        });
     </script>
 </body>
 </html>"""
+
+def _render_message(role: str, ts: str, content: str) -> str:
+    """Render one message as an HTML block"""
+    content = html.escape(content)
+    
+    # Simple code block formatting
+    content = _CODE_BLOCK_RE.sub(r"<pre>\1</pre>", content)
+    content = _INLINE_CODE_RE.sub(r"<code>\1</code>", content)
+    content = content.replace("\n", "<br>")
+    
+    return f"""
+            <div class="message {role}">
+                <div class="timestamp">{ts}</div>
+                <div class="message-content">{content}</div>
+            </div>"""
+
+def export_conversation(
+    agent_id: str,
+    model_name: str,
+    messages: List[Dict[str, Any]], 
+    config: Dict[str, Any],
+    statistics: Dict[str, Any],
+    export_dir: Path, 
+    format_type: str
+) -> str:
+    """Export the conversation in the specified format"""
+    exporter = _EXPORTERS.get(format_type)
+    if exporter is None:
+        raise ValueError(f"Unsupported export format: {format_type}")
+    
+    # One clock read so the filename and the exported-at fields agree
+    now = datetime.now()
+    timestamp = f"{now:%Y%m%d_%H%M%S}_{next(_export_seq)}"
+    return exporter(
+        agent_id, model_name, messages, export_dir, timestamp,
+        config=config, statistics=statistics,
+        exported_at=now.strftime("%Y-%m-%d %H:%M:%S"), exported_iso=now.isoformat()
+    )
+
+def _export_json(
+    agent_id: str,
+    model_name: str, 
+    messages: List[Dict[str, Any]], 
+    export_dir: Path, 
+    timestamp: str,
+    config: Dict[str, Any],
+    statistics: Dict[str, Any],
+    exported_iso: str,
+    **kwargs: Any
+) -> str:
+    """Export conversation to JSON format"""
+    filename = f"conversation_{timestamp}.json"
+    filepath = export_dir / filename
     
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(html_template)
+    export_data = {
+        "agent_id": agent_id,
+        "model": model_name,
+        "exported_at": exported_iso,
+        "config": config,
+        "messages": [{**msg, "timestamp": datetime.fromtimestamp(msg["timestamp"]).isoformat()} for msg in messages],
+        "statistics": statistics
+    }
+    
+    if HAS_ORJSON:
+        # orjson emits UTF-8 bytes directly, written in a single call
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(export_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        # Serialize once and write in a single call rather than per token
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(export_data, indent=2, ensure_ascii=False))
     
     return str(filepath)
 
+def _export_txt(
+    agent_id: str,
+    model_name: str,
+    messages: List[Dict[str, Any]], 
+    export_dir: Path, 
+    timestamp: str,
+    exported_at: str,
+    **kwargs: Any
+) -> str:
+    """Export conversation to plain text format"""
+    filename = f"conversation_{timestamp}.txt"
+    filepath = export_dir / filename
+    visible = [m for m in messages if m.get("role") in _VISIBLE_ROLES]
+    
+    with open(filepath, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as f:
+        f.write(f"Conversation Export - Grok Multi-Model Chat Agent\n")
+        f.write(f"Agent ID: {agent_id}\n")
+        f.write(f"Model: {model_name}\n")
+        f.write(f"Exported at: {exported_at}\n")
+        f.write("=" * 60 + "\n\n")
+        
+        for msg in visible:
+            timestamp_str = format_timestamp(msg["timestamp"])
+            f.write(f"[{timestamp_str}] {msg['role'].upper()}:\n")
+            f.write(f"{msg['content']}\n\n")
+    
+    return str(filepath)
+
+def _export_markdown(
+    agent_id: str,
+    model_name: str,
+    messages: List[Dict[str, Any]], 
+    export_dir: Path, 
+    timestamp: str,
+    exported_at: str,
+    **kwargs: Any
+) -> str:
+    """Export conversation to Markdown format"""
+    filename = f"conversation_{timestamp}.md"
+    filepath = export_dir / filename
+    visible = [m for m in messages if m.get("role") in _VISIBLE_ROLES]
+    
+    with open(filepath, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as f:
+        f.write(f"# Conversation - Grok Multi-Model Chat Agent\n\n")
+        f.write(f"**Agent ID:** {agent_id}  \n")
+        f.write(f"**Model:** {model_name}  \n")
+        f.write(f"**Exported at:** {exported_at}  \n\n")
+        
+        for msg in visible:
+            timestamp_str = format_timestamp(msg["timestamp"])
+            role_emoji = "🧑" if msg["role"] == "user" else "🤖"
+            f.write(f"## {role_emoji} {msg['role'].title()} - {timestamp_str}\n\n")
+            f.write(f"{msg['content']}\n\n")
+    
+    return str(filepath)
+
+def _export_html(
+    agent_id: str,
+    model_name: str,
+    messages: List[Dict[str, Any]], 
+    export_dir: Path, 
+    timestamp: str,
+    exported_at: str,
+    **kwargs: Any
+) -> str:
+    """Export conversation to HTML format"""
+    filename = f"conversation_{timestamp}.html"
+    filepath = export_dir / filename
+    visible = [m for m in messages if m.get("role") in _VISIBLE_ROLES]
+    
+    with open(filepath, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as f:
+        # HTML template with styling
+        f.write(_HTML_HEAD.format(model_name=model_name, agent_id=agent_id))
+        f.write(_HTML_STYLE)
+        f.write(_HTML_HEADER.format(
+            agent_id=agent_id,
+            model_name=model_name,
+            exported_at=exported_at
+        ))
+        
+        # Add messages
+        for msg in visible:
+            f.write(_render_message(msg["role"], format_timestamp(msg["timestamp"]), msg["content"]))
+        
+        # Close HTML
+        f.write(_HTML_FOOTER.format(total_messages=len(visible)))
+        f.write(_HTML_SCRIPT)
+    
+    return str(filepath)
+
+# Exporters by format; config, statistics and export times are passed as keywords
+_EXPORTERS: Dict[str, Callable[..., str]] = {
+    "json": _export_json,
+    "txt": _export_txt,
+    "md": _export_markdown,
+    "html": _export_html
+}
+
 def get_export_formats() -> List[str]:
     """Get list of supported export formats"""
-    return ["json", "txt", "md", "html"]
+    return list(_EXPORTERS)
 
 def validate_export_format(format_type: str) -> bool:
     """Validate if export format is supported"""
-    return format_type.lower() in get_export_formats()
\ No newline at end of file
+    return format_type.lower() in _EXPORTERS
\ No newline at end of file
@@ -11,17 +11,23 @@ Usage:
 
 import argparse
 import sys
+from dataclasses import asdict, replace
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional
 
-from agent import GrokChatAgent
 from config import AgentConfig, SUPPORTED_MODELS
-from utils import setup_colorama, print_colored
-from export import export_conversation
+from utils import setup_colorama, print_colored, format_timestamp
+
+if TYPE_CHECKING:
+    # Imported lazily in main() so --list/--info/--help skip requests and friends
+    from agent import GrokChatAgent
 
 # Initialize colorama
 Fore, Style = setup_colorama()
 
+# Number of streamed characters written before stdout is flushed
+STREAM_FLUSH_CHARS = 64
+
 def create_parser() -> argparse.ArgumentParser:
     """Create and configure the argument parser."""
     parser = argparse.ArgumentParser(
@@ -105,13 +111,9 @@ def list_agents():
     print("-" * 75)
 
     for agent in agents:
-        updated = agent.get("updated_at", "Unknown")
-        if updated != "Unknown":
-            try:
-                from datetime import datetime
-                updated = datetime.fromisoformat(updated).strftime("%Y-%m-%d %H:%M")
-            except:
-                pass
+        # format_timestamp is cached and returns unparseable values unchanged
+        updated = agent.get("updated_at")
+        updated = format_timestamp(updated, "%Y-%m-%d %H:%M") if updated else "Unknown"
 
         model = agent.get('model', 'unknown')
         print(f"{agent['id']:<20} {model:<20} {agent.get('message_count', 0):<10} {updated:<25}")
@@ -161,168 +163,228 @@ def create_agent_config_interactive(model: str) -> AgentConfig:
 
     return config
 
-def interactive_chat(agent: GrokChatAgent):
+def _colored_block(title: str, lines: List[str]) -> str:
+    """Render a yellow title followed by white lines as a single string."""
+    white, reset = Fore.WHITE, Style.RESET_ALL
+    body = "".join(f"\n{white}{line}{reset}" for line in lines)
+    return f"{Fore.YELLOW}{title}{reset}{body}"
+
+# /help output, rendered once at import
+_HELP_TEXT = _colored_block("\nAvailable Commands:", [
+    "/help - Show this help message",
+    "/history [n] - Show the last n messages (default 5)",
+    "/search <term> - Search the conversation history",
+    "/stats - Show conversation statistics",
+    "/config - Show current configuration",
+    "/export <json|txt|md|html> - Export the conversation",
+    "/clear - Clear the conversation history",
+    "/files - List available files for inclusion",
+    "/info - Show agent information",
+    "/quit - Exit the chat\n",
+]) + "\n" + "\n".join(
+    f"{Fore.CYAN}{line}{Style.RESET_ALL}" for line in (
+        "File Inclusion: Use {filename} in your messages to include file content.",
+        "Supported: Programming files (.py, .js, etc.), config files, documentation\n",
+    )
+)
+
+def _cmd_help(agent: "GrokChatAgent", args: List[str]) -> bool:
+    """Show the available commands."""
+    print(_HELP_TEXT)
+    return False
+
+def _cmd_history(agent: "GrokChatAgent", args: List[str]) -> bool:
+    """Show the last n messages."""
+    limit = 5
+    if args:
+        try:
+            limit = int(args[0])
+        except ValueError:
+            print_colored("Invalid number", Fore.RED)
+            return False
+
+    recent_messages = list(agent.messages)[-limit:]
+    if not recent_messages:
+        print_colored("No messages in history", Fore.YELLOW)
+    else:
+        cyan, green, white = Fore.CYAN, Fore.GREEN, Fore.WHITE
+        print_colored(f"\nLast {len(recent_messages)} messages:", Fore.YELLOW)
+        for msg in recent_messages:
+            timestamp = format_timestamp(msg["timestamp"], "%H:%M:%S")
+            role_color = cyan if msg["role"] == "user" else green
+            content = msg['content'][:100] + ('...' if len(msg['content']) > 100 else '')
+            print(f"{white}[{timestamp}] {role_color}{msg['role']}: {content}")
+    print()
+    return False
+
+def _cmd_search(agent: "GrokChatAgent", args: List[str]) -> bool:
+    """Search the conversation history."""
+    if not args:
+        print_colored("Usage: /search <term>", Fore.RED)
+        return False
+
+    search_term = ' '.join(args)
+    results = agent.search_history(search_term)
+
+    if not results:
+        print_colored(f"No results found for '{search_term}'", Fore.YELLOW)
+    else:
+        cyan, green, white = Fore.CYAN, Fore.GREEN, Fore.WHITE
+        print_colored(f"\nFound {len(results)} results for '{search_term}':", Fore.YELLOW)
+        for result in results:
+            msg = result["message"]
+            timestamp = format_timestamp(msg["timestamp"], "%H:%M:%S")
+            role_color = cyan if msg["role"] == "user" else green
+            print(f"{white}[{timestamp}] {role_color}{msg['role']}: {result['preview']}")
+    print()
+    return False
+
+def _cmd_stats(agent: "GrokChatAgent", args: List[str]) -> bool:
+    """Show conversation statistics."""
+    stats = agent.get_statistics()
+    lines = [
+        f"Model: {agent.config.model}",
+        f"Total messages: {stats['total_messages']}",
+        f"User messages: {stats['user_messages']}",
+        f"Assistant messages: {stats['assistant_messages']}",
+        f"Total characters: {stats['total_characters']:,}",
+        f"Average message length: {stats['average_message_length']:,}",
+    ]
+    if stats['first_message']:
+        lines.append(f"First message: {stats['first_message']}")
+        lines.append(f"Last message: {stats['last_message']}")
+        lines.append(f"Duration: {stats['conversation_duration']}")
+    print(_colored_block("\nConversation Statistics:", lines) + "\n")
+    return False
+
+def _cmd_config(agent: "GrokChatAgent", args: List[str]) -> bool:
+    """Show the current configuration."""
+    config_dict = asdict(agent.config)
+    lines = [f"{key}: {value}" for key, value in config_dict.items()
+             if key not in ('created_at', 'updated_at')]
+    print(_colored_block("\nCurrent Configuration:", lines) + "\n")
+    return False
+
+def _cmd_export(agent: "GrokChatAgent", args: List[str]) -> bool:
+    """Export the conversation."""
+    if not args:
+        print_colored("Usage: /export <json|txt|md|html>", Fore.RED)
+        return False
+
+    format_type = args[0].lower()
+    if format_type not in ['json', 'txt', 'md', 'html']:
+        print_colored("Invalid format. Use: json, txt, md, or html", Fore.RED)
+        return False
+
+    try:
+        filepath = agent.export_conversation(format_type)
+        print_colored(f"Exported to: {filepath}", Fore.GREEN)
+    except Exception as e:
+        print_colored(f"Export failed: {e}", Fore.RED)
+    return False
+
+def _cmd_clear(agent: "GrokChatAgent", args: List[str]) -> bool:
+    """Clear the conversation history after confirmation."""
+    confirm = input(f"{Fore.YELLOW}Clear conversation history? (y/N): {Style.RESET_ALL}").strip().lower()
+    if confirm in ['y', 'yes']:
+        agent.clear_history()
+        print_colored("Conversation history cleared", Fore.GREEN)
+    return False
+
+def _cmd_files(agent: "GrokChatAgent", args: List[str]) -> bool:
+    """List files available for inclusion."""
+    files = agent.list_files()
+    if not files:
+        print_colored("No supported files found for inclusion", Fore.YELLOW)
+    else:
+        print_colored(f"\nFiles available for inclusion:", Fore.YELLOW)
+        for file_info in files[:20]:  # Limit to 20 files
+            print_colored(f"{file_info}", Fore.WHITE)
+        if len(files) > 20:
+            print_colored(f"... and {len(files) - 20} more files", Fore.YELLOW)
+        print_colored(f"Use {{filename}} in your message to include file content\n", Fore.CYAN)
+    return False
+
+def _cmd_info(agent: "GrokChatAgent", args: List[str]) -> bool:
+    """Show agent information."""
+    show_agent_info(agent.agent_id, agent.model_key)
+    return False
+
+def _cmd_quit(agent: "GrokChatAgent", args: List[str]) -> bool:
+    """Leave the chat session."""
+    print_colored("Goodbye!", Fore.GREEN)
+    return True
+
+# Slash command handlers; a handler returns True to end the session
+_COMMANDS = {
+    'help': _cmd_help,
+    'history': _cmd_history,
+    'search': _cmd_search,
+    'stats': _cmd_stats,
+    'config': _cmd_config,
+    'export': _cmd_export,
+    'clear': _cmd_clear,
+    'files': _cmd_files,
+    'info': _cmd_info,
+    'quit': _cmd_quit,
+    'exit': _cmd_quit,
+    'q': _cmd_quit,
+}
+
+def interactive_chat(agent: "GrokChatAgent"):
     """Interactive chat session."""
     model_info = SUPPORTED_MODELS[agent.model_key]
-    
-    print_colored(f"\nStarting interactive chat with {model_info['name']}", Fore.GREEN)
-    print_colored(f"Agent: {agent.agent_id}", Fore.YELLOW)
-    print_colored(f"Type '/help' for commands, '/quit' to exit\n", Fore.GREEN)
+    # Resolve colors once instead of on every REPL turn
+    cyan, green, yellow, red, reset = (
+        Fore.CYAN, Fore.GREEN, Fore.YELLOW, Fore.RED, Style.RESET_ALL
+    )
+    prompt = f"{cyan}You: {reset}"
+    commands = _COMMANDS
+
+    print_colored(f"\nStarting interactive chat with {model_info['name']}", green)
+    print_colored(f"Agent: {agent.agent_id}", yellow)
+    print_colored(f"Type '/help' for commands, '/quit' to exit\n", green)
 
     while True:
         try:
-            user_input = input(f"{Fore.CYAN}You: {Style.RESET_ALL}").strip()
+            user_input = input(prompt).strip()
 
             if not user_input:
                 continue
 
             # Handle commands
-            if user_input.startswith('/'):
+            if user_input[0] == '/':
                 command_parts = user_input[1:].split()
+                if not command_parts:
+                    continue
                 command = command_parts[0].lower()
-
-                if command == 'help':
-                    print_colored(f"\nAvailable Commands:", Fore.YELLOW)
-                    print_colored(f"/help - Show this help message", Fore.WHITE)
-                    print_colored(f"/history [n] - Show the last n messages (default 5)", Fore.WHITE)
-                    print_colored(f"/search <term> - Search the conversation history", Fore.WHITE)
-                    print_colored(f"/stats - Show conversation statistics", Fore.WHITE)
-                    print_colored(f"/config - Show current configuration", Fore.WHITE)
-                    print_colored(f"/export <json|txt|md|html> - Export the conversation", Fore.WHITE)
-                    print_colored(f"/clear - Clear the conversation history", Fore.WHITE)
-                    print_colored(f"/files - List available files for inclusion", Fore.WHITE)
-                    print_colored(f"/info - Show agent information", Fore.WHITE)
-                    print_colored(f"/quit - Exit the chat\n", Fore.WHITE)
-                    print_colored(f"File Inclusion: Use {{filename}} in your messages to include file content.", Fore.CYAN)
-                    print_colored(f"Supported: Programming files (.py, .js, etc.), config files, documentation\n", Fore.CYAN)
-
-                elif command == 'history':
-                    limit = 5
-                    if len(command_parts) > 1:
-                        try:
-                            limit = int(command_parts[1])
-                        except ValueError:
-                            print_colored("Invalid number", Fore.RED)
-                            continue
-
-                    recent_messages = agent.messages[-limit:]
-                    if not recent_messages:
-                        print_colored("No messages in history", Fore.YELLOW)
-                    else:
-                        print_colored(f"\nLast {len(recent_messages)} messages:", Fore.YELLOW)
-                        for msg in recent_messages:
-                            from datetime import datetime
-                            timestamp = datetime.fromisoformat(msg["timestamp"]).strftime("%H:%M:%S")
-                            role_color = Fore.CYAN if msg["role"] == "user" else Fore.GREEN
-                            content = msg['content'][:100] + ('...' if len(msg['content']) > 100 else '')
-                            print(f"{Fore.WHITE}[{timestamp}] {role_color}{msg['role']}: {content}")
-                    print()
-
-                elif command == 'search':
-                    if len(command_parts) < 2:
-                        print_colored("Usage: /search <term>", Fore.RED)
-                        continue
-
-                    search_term = ' '.join(command_parts[1:])
-                    results = agent.search_history(search_term)
-
-                    if not results:
-                        print_colored(f"No results found for '{search_term}'", Fore.YELLOW)
-                    else:
-                        print_colored(f"\nFound {len(results)} results for '{search_term}':", Fore.YELLOW)
-                        for result in results:
-                            msg = result["message"]
-                            from datetime import datetime
-                            timestamp = datetime.fromisoformat(msg["timestamp"]).strftime("%H:%M:%S")
-                            role_color = Fore.CYAN if msg["role"] == "user" else Fore.GREEN
-                            print(f"{Fore.WHITE}[{timestamp}] {role_color}{msg['role']}: {result['preview']}")
-                    print()
-
-                elif command == 'stats':
-                    stats = agent.get_statistics()
-                    print_colored(f"\nConversation Statistics:", Fore.YELLOW)
-                    print_colored(f"Model: {agent.config.model}", Fore.WHITE)
-                    print_colored(f"Total messages: {stats['total_messages']}", Fore.WHITE)
-                    print_colored(f"User messages: {stats['user_messages']}", Fore.WHITE)
-                    print_colored(f"Assistant messages: {stats['assistant_messages']}", Fore.WHITE)
-                    print_colored(f"Total characters: {stats['total_characters']:,}", Fore.WHITE)
-                    print_colored(f"Average message length: {stats['average_message_length']:,}", Fore.WHITE)
-                    if stats['first_message']:
-                        print_colored(f"First message: {stats['first_message']}", Fore.WHITE)
-                        print_colored(f"Last message: {stats['last_message']}", Fore.WHITE)
-                        print_colored(f"Duration: {stats['conversation_duration']}", Fore.WHITE)
-                    print()
-
-                elif command == 'config':
-                    print_colored(f"\nCurrent Configuration:", Fore.YELLOW)
-                    from dataclasses import asdict
-                    config_dict = asdict(agent.config)
-                    for key, value in config_dict.items():
-                        if key not in ['created_at', 'updated_at']:
-                            print_colored(f"{key}: {value}", Fore.WHITE)
-                    print()
-
-                elif command == 'export':
-                    if len(command_parts) < 2:
-                        print_colored("Usage: /export <json|txt|md|html>", Fore.RED)
-                        continue
-
-                    format_type = command_parts[1].lower()
-                    if format_type not in ['json', 'txt', 'md', 'html']:
-                        print_colored("Invalid format. Use: json, txt, md, or html", Fore.RED)
-                        continue
-
-                    try:
-                        filepath = agent.export_conversation(format_type)
-                        print_colored(f"Exported to: {filepath}", Fore.GREEN)
-                    except Exception as e:
-                        print_colored(f"Export failed: {e}", Fore.RED)
-
-                elif command == 'clear':
-                    confirm = input(f"{Fore.YELLOW}Clear conversation history? (y/N): {Style.RESET_ALL}").strip().lower()
-                    if confirm in ['y', 'yes']:
-                        agent.clear_history()
-                        print_colored("Conversation history cleared", Fore.GREEN)
-
-                elif command == 'files':
-                    files = agent.list_files()
-                    if not files:
-                        print_colored("No supported files found for inclusion", Fore.YELLOW)
-                    else:
-                        print_colored(f"\nFiles available for inclusion:", Fore.YELLOW)
-                        for file_info in files[:20]:  # Limit to 20 files
-                            print_colored(f"{file_info}", Fore.WHITE)
-                        if len(files) > 20:
-                            print_colored(f"... and {len(files) - 20} more files", Fore.YELLOW)
-                        print_colored(f"Use {{filename}} in your message to include file content\n", Fore.CYAN)
-
-                elif command == 'info':
-                    show_agent_info(agent.agent_id, agent.model_key)
-
-                elif command in ['quit', 'exit', 'q']:
-                    print_colored("Goodbye!", Fore.GREEN)
+                handler = commands.get(command)
+                if handler is None:
+                    print_colored(f"Unknown command: {command}", red)
+                    print_colored("Type '/help' for available commands", yellow)
+                elif handler(agent, command_parts[1:]):
                     break
-
-                else:
-                    print_colored(f"Unknown command: {command}", Fore.RED)
-                    print_colored("Type '/help' for available commands", Fore.YELLOW)
-
                 continue
 
             # Regular message - send to API
-            print(f"\n{Fore.GREEN}Assistant: {Style.RESET_ALL}", end="", flush=True)
+            print(f"\n{green}Assistant: {reset}", end="", flush=True)
 
-            response_text = ""
+            # Flush on newlines or every few dozen characters rather than per chunk
+            pending = 0
             for chunk in agent.call_api(user_input):
-                print(chunk, end="", flush=True)
-                response_text += chunk
+                sys.stdout.write(chunk)
+                pending += len(chunk)
+                if pending >= STREAM_FLUSH_CHARS or "\n" in chunk:
+                    sys.stdout.flush()
+                    pending = 0
+            sys.stdout.flush()
 
             print("\n")
 
         except KeyboardInterrupt:
-            print_colored(f"\nUse '/quit' to exit gracefully", Fore.YELLOW)
+            print_colored(f"\nUse '/quit' to exit gracefully", yellow)
         except Exception as e:
-            print_colored(f"\nError: {e}", Fore.RED)
+            print_colored(f"\nError: {e}", red)
 
 def main():
     """Main CLI interface."""
@@ -352,6 +414,7 @@ def main():
 
     try:
         # Initialize the agent
+        from agent import GrokChatAgent
         agent = GrokChatAgent(args.agent_id, args.model)
 
         # Handle the config command
@@ -376,8 +439,7 @@ def main():
             overrides["stream"] = False
 
         if overrides:
-            from dataclasses import asdict
-            agent.config = AgentConfig(**{**asdict(agent.config), **overrides})
+            agent.config = replace(agent.config, **overrides)
             agent.save_config()
 
         # Start the interactive chat
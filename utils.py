@@ -4,13 +4,40 @@ Utilities for directories, logging, backups, and general helper functions
 """
 
 import os
+import sys
 import json
-import yaml
-import shutil
+import time
 import logging
+import threading
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from config import SUPPORTED_EXTENSIONS
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Colorless stand-ins, used without colorama or when stdout is not a terminal
+class _PlainFore:
+    RED = GREEN = YELLOW = BLUE = MAGENTA = CYAN = WHITE = RESET = ""
+
+class _PlainStyle:
+    BRIGHT = DIM = RESET_ALL = ""
+
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
 
 try:
     from colorama import Fore, Style, init as colorama_init
@@ -19,21 +46,86 @@ except ImportError:
     HAS_COLORAMA = False
     
     # Fallback classes if colorama is not available
-    class Fore:
-        RED = GREEN = YELLOW = BLUE = MAGENTA = CYAN = WHITE = RESET = ""
-        
-    class Style:
-        BRIGHT = DIM = RESET_ALL = ""
+    Fore, Style = _PlainFore, _PlainStyle
+
+# JSON copy written next to each saved YAML file; read instead of the YAML while it is newer
+_YAML_SIDECAR_SUFFIX = ".cache.json"
+
+# Parsed JSON/YAML files keyed by (kind, path, mtime_ns, size), least recently used first
+_PARSE_CACHE_SIZE = 128
+_parse_cache: "OrderedDict[Tuple[str, str, int, int], Any]" = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+# Backups taken by save_json_file: on the first save of a file, then every N saves
+BACKUP_EVERY_N_SAVES = 10
+_save_counts: Dict[str, int] = {}
+
+# Local date string and the epoch time of the next midnight, when it goes stale
+_today_cache: Tuple[float, str] = (0.0, "")
+
+# Configured agent loggers and the dated log file their handler writes to
+_logger_cache: Dict[str, Tuple[logging.Logger, str]] = {}
+
+# Lowercase inclusion suffixes, and extensionless file names that are also supported
+_SUPPORTED_SUFFIXES = frozenset(ext.lower() for ext in SUPPORTED_EXTENSIONS)
+_KNOWN_FILENAMES = frozenset({'makefile', 'dockerfile', 'readme', 'license', 'changelog'})
+
+# Known backups, oldest first, per backup directory and file name pattern
+_backup_rings: Dict[str, deque] = {}
+
+# Search paths for file inclusion that don't depend on the agent
+_STATIC_SEARCH_PATHS = tuple(Path(p) for p in (
+    '.', 'src', 'lib', 'scripts', 'data', 'documents', 'files', 'config', 'configs'
+))
+
+# Units for format_file_size and their sizes in bytes
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+_SIZE_DIVISORS = tuple(1024 ** i for i in range(len(_SIZE_UNITS)))
+
+# Subdirectories created under each agent directory
+_AGENT_SUBDIRS = ("backups", "logs", "exports", "uploads")
+
+# ANSI escapes are only emitted when stdout is a terminal
+_USE_COLOR = sys.stdout is not None and sys.stdout.isatty()
 
 def setup_colorama() -> Tuple[object, object]:
     """Setup colorama and return Fore, Style classes"""
+    if not _USE_COLOR:
+        return _PlainFore, _PlainStyle
     if HAS_COLORAMA:
         colorama_init(autoreset=True)
     return Fore, Style
 
+def colored(message: str, color: str = "") -> str:
+    """Wrap a message in color codes when color output is enabled"""
+    return f"{color}{message}{Style.RESET_ALL}" if color and _USE_COLOR else message
+
 def print_colored(message: str, color: str = ""):
     """Print colored message"""
-    print(f"{color}{message}{Style.RESET_ALL}" if color else message)
+    print(colored(message, color))
+
+def format_timestamp(value: Any, fmt: str = "%Y-%m-%d %H:%M:%S") -> str:
+    """Format a message timestamp (epoch seconds, or an ISO string from older histories)"""
+    if isinstance(value, (int, float)):
+        # Formats have second resolution, so messages in the same second share a cache entry
+        return _format_epoch_seconds(int(value), fmt)
+    return _format_iso_timestamp(value, fmt)
+
+@lru_cache(maxsize=4096)
+def _format_epoch_seconds(seconds: int, fmt: str) -> str:
+    """Format whole epoch seconds, memoized"""
+    try:
+        return datetime.fromtimestamp(seconds).strftime(fmt)
+    except (OverflowError, OSError, ValueError):
+        return str(seconds)
+
+@lru_cache(maxsize=4096)
+def _format_iso_timestamp(value: Any, fmt: str) -> str:
+    """Format an ISO timestamp string, memoized"""
+    try:
+        return datetime.fromisoformat(value).strftime(fmt)
+    except (TypeError, ValueError):
+        return str(value)
 
 def ensure_directory(path: Path) -> None:
     """Ensure directory exists, create if it doesn't"""
@@ -42,102 +134,347 @@ def ensure_directory(path: Path) -> None:
 def setup_agent_directories(agent_id: str) -> Path:
     """Setup directory structure for an agent"""
     base_dir = Path(f"agents/{agent_id}")
-    directories = [
-        base_dir,
-        base_dir / "backups",
-        base_dir / "logs", 
-        base_dir / "exports",
-        base_dir / "uploads"
-    ]
+    ensure_directory(base_dir)
     
-    for directory in directories:
-        ensure_directory(directory)
+    # Parents exist now, so each subdirectory is a single mkdir
+    for sub in _AGENT_SUBDIRS:
+        (base_dir / sub).mkdir(exist_ok=True)
     
     return base_dir
 
+def _today_str() -> str:
+    """Today's local date as YYYY-MM-DD, recomputed only after midnight"""
+    global _today_cache
+    now = time.time()
+    valid_until, today = _today_cache
+    if now >= valid_until:
+        local = time.localtime(now)
+        today = time.strftime('%Y-%m-%d', local)
+        # mktime normalizes day + 1 across month and year ends
+        valid_until = time.mktime((local.tm_year, local.tm_mon, local.tm_mday + 1, 0, 0, 0, 0, 0, -1))
+        _today_cache = (valid_until, today)
+    return today
+
+class _CachedTimeFormatter(logging.Formatter):
+    """Formatter that renders the date part of asctime once per second"""
+    
+    _cache: Tuple[int, str] = (-1, "")
+    
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        second = int(record.created)
+        cached_second, text = self._cache
+        if second != cached_second:
+            text = time.strftime(datefmt or self.default_time_format, self.converter(record.created))
+            self._cache = (second, text)
+        if datefmt:
+            return text
+        return self.default_msec_format % (text, record.msecs)
+
 def setup_logging(agent_id: str, base_dir: Path) -> logging.Logger:
     """Configure logging for an agent"""
-    log_file = base_dir / "logs" / f"{datetime.now().strftime('%Y-%m-%d')}.log"
+    today = _today_str()
+    log_file = base_dir / "logs" / f"{today}.log"
+    
+    # Already configured today for this directory: reuse the open handlers
+    cached = _logger_cache.get(agent_id)
+    if cached is not None and cached[1] == str(log_file):
+        return cached[0]
     
     # Create logger
     logger = logging.getLogger(f"GrokAgent_{agent_id}")
     logger.setLevel(logging.INFO)
-    
-    # Clear existing handlers
-    logger.handlers.clear()
+    # Records are fully handled here; don't hand them to root handlers as well
+    logger.propagate = False
     
     # File handler
     file_handler = logging.FileHandler(log_file, encoding='utf-8')
-    file_formatter = logging.Formatter(
+    file_formatter = _CachedTimeFormatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     file_handler.setFormatter(file_formatter)
     
-    # Console handler
-    console_handler = logging.StreamHandler()
-    console_formatter = logging.Formatter('%(levelname)s: %(message)s')
-    console_handler.setFormatter(console_formatter)
-    console_handler.setLevel(logging.WARNING)
-    
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    if cached is not None:
+        # New day (or directory): swap only the file handler
+        for handler in [h for h in logger.handlers if isinstance(h, logging.FileHandler)]:
+            logger.removeHandler(handler)
+            handler.close()
+        logger.addHandler(file_handler)
+    else:
+        # Clear existing handlers
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        
+        # Console handler
+        console_handler = logging.StreamHandler()
+        console_formatter = logging.Formatter('%(levelname)s: %(message)s')
+        console_handler.setFormatter(console_formatter)
+        console_handler.setLevel(logging.WARNING)
+        
+        logger.addHandler(file_handler)
+        logger.addHandler(console_handler)
     
+    _logger_cache[agent_id] = (logger, str(log_file))
     return logger
 
 def create_backup(file_path: Path, backup_dir: Path, max_backups: int = 10) -> None:
-    """Create a rolling backup of a file"""
+    """Create a rolling backup of a file
+    
+    Backups are hard links when possible, so the file must be replaced rather
+    than rewritten in place afterwards (save_json_file does this).
+    """
     if not file_path.exists():
         return
     
     ensure_directory(backup_dir)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
     backup_file = backup_dir / f"{file_path.stem}_{timestamp}{file_path.suffix}"
     
     try:
-        shutil.copy2(file_path, backup_file)
+        # A backup from the same second is superseded by this one
+        if backup_file.exists():
+            backup_file.unlink()
+        try:
+            os.link(file_path, backup_file)
+        except OSError:
+            # Different filesystem or no hard link support
+            import shutil
+            shutil.copy2(file_path, backup_file)
         
-        # Keep only the last max_backups backups
-        backups = sorted(backup_dir.glob(f"{file_path.stem}_*{file_path.suffix}"))
-        while len(backups) > max_backups:
-            oldest = backups.pop(0)
-            oldest.unlink()
+        # Keep only the last max_backups backups; the directory is listed once per process
+        pattern = f"{file_path.stem}_*{file_path.suffix}"
+        ring_key = str(backup_dir / pattern)
+        ring = _backup_rings.get(ring_key)
+        if ring is None:
+            # Timestamped names sort chronologically
+            ring = _backup_rings[ring_key] = deque(sorted(backup_dir.glob(pattern)))
+        elif not ring or ring[-1] != backup_file:
+            ring.append(backup_file)
+        while len(ring) > max_backups:
+            try:
+                ring.popleft().unlink()
+            except FileNotFoundError:
+                pass
             
     except Exception as e:
         print_colored(f"Error creating backup: {e}", Fore.RED)
 
-def load_json_file(file_path: Path, default: Any = None) -> Any:
-    """Load JSON file with error handling"""
-    if not file_path.exists():
+def _freeze(value: Any) -> Any:
+    """Make a parsed JSON/YAML tree read-only: dicts become mapping proxies, lists tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+def _cached_parse(kind: str, file_path: Path, st: os.stat_result, parse, readonly: bool) -> Any:
+    """Return the parsed file, parsing only when it changed on disk
+    
+    The cache holds frozen trees shared by readonly callers; others always get a fresh parse.
+    """
+    if not readonly:
+        # Copying a cached tree costs about as much as parsing, so skip the cache
+        return parse(file_path, st)
+    
+    key = (kind, str(file_path), st.st_mtime_ns, st.st_size)
+    with _parse_cache_lock:
+        frozen = _parse_cache.get(key)
+        if frozen is not None:
+            _parse_cache.move_to_end(key)
+            return frozen
+    
+    # Parsed outside the lock so threads can parse different files concurrently
+    frozen = _freeze(parse(file_path, st))
+    with _parse_cache_lock:
+        _parse_cache[key] = frozen
+        if len(_parse_cache) > _PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+    return frozen
+
+def _invalidate_parse_cache(file_path: Path) -> None:
+    """Drop cached parses of a file that is being rewritten"""
+    path = str(file_path)
+    with _parse_cache_lock:
+        for key in [k for k in _parse_cache if k[1] == path]:
+            del _parse_cache[key]
+
+def _parse_json(file_path: Path, st: os.stat_result) -> Any:
+    """Parse a JSON file"""
+    if HAS_ORJSON:
+        return orjson.loads(file_path.read_bytes())
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _yaml_sidecar(file_path: Path) -> Path:
+    """Path of the JSON sidecar for a YAML file"""
+    return file_path.with_name(file_path.name + _YAML_SIDECAR_SUFFIX)
+
+def _write_yaml_sidecar(file_path: Path, st: os.stat_result, data: Any) -> None:
+    """Write the JSON sidecar for a YAML file, skipping data JSON can't hold exactly"""
+    # The sidecar is only valid for the exact YAML file it was made from
+    sidecar = {"yaml_mtime_ns": st.st_mtime_ns, "yaml_size": st.st_size, "data": data}
+    try:
+        if HAS_ORJSON:
+            # Passthrough makes YAML dates raise instead of silently becoming strings
+            payload = orjson.dumps(sidecar, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        else:
+            payload = json.dumps(sidecar, ensure_ascii=False).encode('utf-8')
+        _yaml_sidecar(file_path).write_bytes(payload)
+    except (TypeError, ValueError, OSError):
+        pass
+
+def _parse_yaml(file_path: Path, st: os.stat_result) -> Any:
+    """Parse a YAML file, preferring its JSON sidecar when it matches the file exactly"""
+    try:
+        raw = _yaml_sidecar(file_path).read_bytes()
+        sidecar = orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
+        # Compared for equality, since a restored older file can carry an older mtime
+        if (isinstance(sidecar, dict)
+                and sidecar.get("yaml_mtime_ns") == st.st_mtime_ns
+                and sidecar.get("yaml_size") == st.st_size):
+            return sidecar.get("data")
+    except (OSError, ValueError):
+        pass
+    
+    # Imported on first use; the sidecar and parse cache usually make it unnecessary
+    import yaml
+    
+    # libyaml's C loader when PyYAML was built with it
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = yaml.load(f, Loader=loader)
+    _write_yaml_sidecar(file_path, st, data)
+    return data
+
+def load_json_file(file_path: Path, default: Any = None, readonly: bool = False) -> Any:
+    """Load JSON file with error handling
+    
+    With readonly=True the shared cached tree is returned as mapping proxies and tuples.
+    """
+    try:
+        st = file_path.stat()
+    except OSError:
         return default or []
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return _cached_parse("json", file_path, st, _parse_json, readonly)
     except Exception as e:
         print_colored(f"Error loading {file_path}: {e}", Fore.RED)
         return default or []
 
+def _atomic_write_bytes(file_path: Path, payload: bytes) -> None:
+    """Write a file through a temporary sibling so readers never see a torn file"""
+    tmp_path = file_path.with_name(f"{file_path.name}.tmp.{os.getpid()}")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+def _write_history_count(history_file: Path, count: int) -> None:
+    """Record the message count of a history checkpoint next to it"""
+    # Stored with the checkpoint's mtime and size so it is only valid for that exact file
+    try:
+        st = history_file.stat()
+        history_file.with_suffix(".count").write_text(f"{st.st_mtime_ns} {st.st_size} {count}")
+    except OSError:
+        pass
+
+def _history_checkpoint_count(history_entry: os.DirEntry, count_entry: Optional[os.DirEntry]) -> int:
+    """Message count of history.json, from its counter file when it matches exactly"""
+    if count_entry is not None:
+        try:
+            st = history_entry.stat()
+            mtime_ns, size, count = map(int, Path(count_entry.path).read_text().split())
+            if (mtime_ns, size) == (st.st_mtime_ns, st.st_size):
+                return count
+        except (OSError, ValueError):
+            pass
+    
+    # Parsed once here, then the rewritten counter serves later listings
+    history = load_json_file(Path(history_entry.path), [], readonly=True)
+    count = len(history) if isinstance(history, (list, tuple)) else 0
+    _write_history_count(Path(history_entry.path), count)
+    return count
+
 def save_json_file(file_path: Path, data: Any, create_backup_file: bool = True) -> bool:
     """Save JSON file with optional backup"""
     try:
-        if create_backup_file and file_path.exists():
-            create_backup(file_path, file_path.parent / "backups")
+        if create_backup_file:
+            # Back up on the first save in a process and then every few saves
+            key = str(file_path)
+            count = _save_counts.get(key, 0)
+            _save_counts[key] = count + 1
+            if count % BACKUP_EVERY_N_SAVES == 0 and file_path.exists():
+                create_backup(file_path, file_path.parent / "backups")
             
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        _invalidate_parse_cache(file_path)
+        if HAS_ORJSON:
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        else:
+            payload = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+        _atomic_write_bytes(file_path, payload)
+        if file_path.name == "history.json" and isinstance(data, list):
+            _write_history_count(file_path, len(data))
         return True
     except Exception as e:
         print_colored(f"Error saving {file_path}: {e}", Fore.RED)
         return False
 
-def load_yaml_file(file_path: Path, default: Any = None) -> Any:
-    """Load YAML file with error handling"""
+def load_jsonl_file(file_path: Path) -> List[Any]:
+    """Load a JSON Lines file, skipping lines that cannot be parsed"""
     if not file_path.exists():
-        return default
+        return []
     
+    records = []
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Partial line left by an interrupted write
+                    continue
+    except Exception as e:
+        print_colored(f"Error loading {file_path}: {e}", Fore.RED)
+    return records
+
+def append_jsonl_line(file_path: Path, data: Any) -> bool:
+    """Append a single record to a JSON Lines file"""
+    try:
+        if HAS_ORJSON:
+            line = orjson.dumps(data) + b"\n"
+        else:
+            line = (json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n").encode('utf-8')
+        with open(file_path, 'ab') as f:
+            f.write(line)
+        return True
+    except Exception as e:
+        print_colored(f"Error appending to {file_path}: {e}", Fore.RED)
+        return False
+
+def load_yaml_file(file_path: Path, default: Any = None, readonly: bool = False) -> Any:
+    """Load YAML file with error handling
+    
+    With readonly=True the shared cached tree is returned as mapping proxies and tuples.
+    """
+    try:
+        st = file_path.stat()
+    except OSError:
+        return default
+    
+    try:
+        return _cached_parse("yaml", file_path, st, _parse_yaml, readonly)
     except Exception as e:
         print_colored(f"Error loading {file_path}: {e}", Fore.RED)
         return default
@@ -145,8 +482,12 @@ def load_yaml_file(file_path: Path, default: Any = None) -> Any:
 def save_yaml_file(file_path: Path, data: Any) -> bool:
     """Save YAML file with error handling"""
     try:
+        import yaml
+        
+        _invalidate_parse_cache(file_path)
         with open(file_path, 'w', encoding='utf-8') as f:
             yaml.dump(data, f, default_flow_style=False, allow_unicode=True)
+        _write_yaml_sidecar(file_path, file_path.stat(), data)
         return True
     except Exception as e:
         print_colored(f"Error saving {file_path}: {e}", Fore.RED)
@@ -216,108 +557,159 @@ def load_api_key(base_dir: Path) -> Optional[str]:
             print_colored(f"Error reading secrets file: {e}", Fore.RED)
     return None
 
-def is_supported_file(file_path: Path) -> bool:
-    """Check if the file extension is supported for inclusion"""
-    from config import SUPPORTED_EXTENSIONS
+def is_supported_file(file_path: Path, suffix: Optional[str] = None) -> bool:
+    """Check if the file extension is supported for inclusion
     
-    if file_path.suffix.lower() in SUPPORTED_EXTENSIONS:
-        return True
+    suffix may be passed when the caller already has the lowercase suffix.
+    """
+    if suffix is None:
+        suffix = file_path.suffix
+        suffix = suffix.lower() if suffix else suffix
     
-    # Check for known files without extensions
-    known_files = {
-        'makefile', 'dockerfile', 'readme', 'license', 'changelog'
-    }
-    
-    return file_path.name.lower() in known_files
+    # The name is only lowered when the extension didn't match
+    return suffix in _SUPPORTED_SUFFIXES or file_path.name.lower() in _KNOWN_FILENAMES
 
-def get_search_paths(base_dir: Path) -> List[Path]:
+def get_search_paths(base_dir: Path) -> Tuple[Path, ...]:
     """Get standard search paths for file inclusion"""
-    return [
-        Path('.'),
-        Path('src'), Path('lib'),
-        Path('scripts'), Path('data'),
-        Path('documents'), Path('files'),
-        Path('config'), Path('configs'),
-        base_dir / 'uploads'
-    ]
+    return (*_STATIC_SEARCH_PATHS, base_dir / 'uploads')
+
+def _walk_roots(search_paths: Tuple[Path, ...]) -> List[str]:
+    """Existing search paths, minus those already covered by walking another one"""
+    roots = {}
+    for search_path in search_paths:
+        if search_path.is_dir():
+            roots.setdefault(os.path.realpath(search_path), str(search_path))
+    
+    walk = []
+    for real, root in roots.items():
+        covered = False
+        for other in roots:
+            if other != real and real.startswith(other + os.sep):
+                # Dotted directories are pruned, so only a clean relative path is covered
+                rel_parts = os.path.relpath(real, other).split(os.sep)
+                if not any(part.startswith('.') for part in rel_parts):
+                    covered = True
+                    break
+        if not covered:
+            walk.append(root)
+    return walk
 
 def list_available_files(base_dir: Path) -> List[str]:
     """List available files for inclusion"""
     files = []
-    search_paths = get_search_paths(base_dir)
+    stack = _walk_roots(get_search_paths(base_dir))
     
-    for search_path in search_paths:
-        if search_path.exists():
-            for file_path in search_path.rglob("*"):
-                if (file_path.is_file() and
-                    not file_path.name.startswith('.') and
-                    is_supported_file(file_path)):
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    name = entry.name
+                    # Prunes dotted directories along with dotted files
+                    if name.startswith('.'):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        if not entry.is_file():
+                            continue
+                        suffix = os.path.splitext(name)[1]
+                        if (suffix.lower() not in _SUPPORTED_SUFFIXES and
+                                not is_supported_file(Path(name), suffix.lower())):
+                            continue
+                        size = entry.stat().st_size
+                    except OSError:
+                        continue
                     
-                    size = file_path.stat().st_size
                     size_str = f"{size:,} bytes" if size < 1024*1024 else f"{size/(1024*1024):.1f} MB"
-                    files.append(f"{file_path} ({size_str}) [{file_path.suffix}]")
+                    files.append(f"{Path(entry.path)} ({size_str}) [{suffix}]")
+        except OSError:
+            continue
     
     return sorted(files)
 
+def _inspect_agent(agent_dir: Path) -> Optional[Dict[str, Any]]:
+    """Collect the listing details of one agent directory"""
+    # One directory read gives every file's DirEntry, with stat cached
+    try:
+        with os.scandir(agent_dir) as it:
+            entries = {entry.name: entry for entry in it}
+    except OSError:
+        return None
+    
+    # Basic info
+    agent_info = {
+        "id": agent_dir.name,
+        "path": str(agent_dir),
+        "exists": True
+    }
+    
+    # Load metadata if available
+    if "metadata.json" in entries:
+        metadata = load_json_file(agent_dir / "metadata.json", {}, readonly=True)
+        if isinstance(metadata, Mapping):
+            agent_info.update(metadata)
+    
+    # Load config info
+    if "config.yaml" in entries:
+        config = load_yaml_file(agent_dir / "config.yaml", readonly=True)
+        if isinstance(config, Mapping):
+            agent_info["model"] = config.get("model", "unknown")
+            agent_info["created_at"] = config.get("created_at")
+            agent_info["updated_at"] = config.get("updated_at")
+    
+    # History info: the checkpoint's count comes from history.count when current,
+    # the append log holds one message per line
+    agent_info["message_count"] = 0
+    agent_info["history_size"] = 0
+    entry = entries.get("history.json")
+    if entry is not None:
+        try:
+            agent_info["message_count"] += _history_checkpoint_count(entry, entries.get("history.count"))
+            agent_info["history_size"] += entry.stat().st_size
+        except OSError:
+            pass
+    entry = entries.get("history.jsonl")
+    if entry is not None:
+        try:
+            raw = Path(entry.path).read_bytes()
+            agent_info["history_size"] += entry.stat().st_size
+        except OSError:
+            raw = b""
+        # Counting newlines leaves out a partial last line, which loading skips too
+        agent_info["message_count"] += raw.count(b"\n")
+    
+    return agent_info
+
 def list_all_agents() -> List[Dict[str, Any]]:
     """List all available agents across all models"""
     agents_dir = Path("agents")
-    agents = []
     
     if not agents_dir.exists():
-        return agents
+        return []
     
-    for agent_dir in agents_dir.iterdir():
-        if agent_dir.is_dir():
-            metadata_file = agent_dir / "metadata.json"
-            config_file = agent_dir / "config.yaml"
-            history_file = agent_dir / "history.json"
-            
-            # Basic info
-            agent_info = {
-                "id": agent_dir.name,
-                "path": str(agent_dir),
-                "exists": True
-            }
-            
-            # Load metadata if available
-            if metadata_file.exists():
-                try:
-                    with open(metadata_file) as f:
-                        metadata = json.load(f)
-                        agent_info.update(metadata)
-                except:
-                    pass
-            
-            # Load config info
-            if config_file.exists():
-                try:
-                    with open(config_file) as f:
-                        config = yaml.safe_load(f)
-                        agent_info["model"] = config.get("model", "unknown")
-                        agent_info["created_at"] = config.get("created_at")
-                        agent_info["updated_at"] = config.get("updated_at")
-                except:
-                    pass
-            
-            # History info
-            if history_file.exists():
-                try:
-                    with open(history_file) as f:
-                        history = json.load(f)
-                        agent_info["message_count"] = len(history)
-                        agent_info["history_size"] = history_file.stat().st_size
-                except:
-                    agent_info["message_count"] = 0
-                    agent_info["history_size"] = 0
-            else:
-                agent_info["message_count"] = 0
-                agent_info["history_size"] = 0
-            
-            agents.append(agent_info)
+    agent_dirs = [d for d in agents_dir.iterdir() if d.is_dir()]
+    if len(agent_dirs) > 1:
+        # Per-agent work is file I/O, so threads overlap it
+        workers = min(32, 4 * (os.cpu_count() or 1), len(agent_dirs))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_inspect_agent, agent_dirs))
+    else:
+        results = [_inspect_agent(d) for d in agent_dirs]
+    agents = [info for info in results if info is not None]
     
     return sorted(agents, key=lambda x: x.get("updated_at", ""))
 
+def _iter_history(history_file: Path, history_log: Path) -> Iterator[Dict[str, Any]]:
+    """Yield checkpointed then appended messages, streaming history.json with ijson if installed"""
+    if HAS_IJSON and history_file.exists():
+        with open(history_file, 'rb') as f:
+            yield from ijson.items(f, 'item', use_float=True)
+    else:
+        yield from load_json_file(history_file, [], readonly=True)
+    yield from load_jsonl_file(history_log)
+
 def show_detailed_agent_info(agent_id: str, model: Optional[str] = None):
     """Display detailed information about an agent"""
     agent_dir = Path(f"agents/{agent_id}")
@@ -326,78 +718,92 @@ def show_detailed_agent_info(agent_id: str, model: Optional[str] = None):
         print_colored(f"Agent '{agent_id}' not found", Fore.RED)
         return
     
-    print_colored(f"\n{'='*50}", Fore.CYAN)
-    print_colored(f"Agent Information: {agent_id}", Fore.YELLOW)
-    print_colored(f"{'='*50}", Fore.CYAN)
+    # Collected and written to stdout in a single call
+    lines = []
+    
+    def add(message: str, color: str = ""):
+        lines.append(colored(message, color))
+    
+    add(f"\n{'='*50}", Fore.CYAN)
+    add(f"Agent Information: {agent_id}", Fore.YELLOW)
+    add(f"{'='*50}", Fore.CYAN)
     
     # Load and display configuration
     config_file = agent_dir / "config.yaml"
     if config_file.exists():
         try:
-            with open(config_file) as f:
-                config = yaml.safe_load(f)
+            config = load_yaml_file(config_file, {}, readonly=True)
             
             model_name = config.get('model', 'unknown')
             
-            print_colored(f"\nConfiguration:", Fore.GREEN)
-            print_colored(f"  Model: {model_name}", Fore.WHITE)
-            print_colored(f"  Temperature: {config.get('temperature', 0.0)}", Fore.WHITE)
-            print_colored(f"  Max Tokens: {config.get('max_tokens', 32768)}", Fore.WHITE)
-            print_colored(f"  Streaming: {config.get('stream', True)}", Fore.WHITE)
-            print_colored(f"  Created at: {config.get('created_at', 'Unknown')}", Fore.WHITE)
-            print_colored(f"  Updated at: {config.get('updated_at', 'Unknown')}", Fore.WHITE)
+            add(f"\nConfiguration:", Fore.GREEN)
+            add(f"  Model: {model_name}", Fore.WHITE)
+            add(f"  Temperature: {config.get('temperature', 0.0)}", Fore.WHITE)
+            add(f"  Max Tokens: {config.get('max_tokens', 32768)}", Fore.WHITE)
+            add(f"  Streaming: {config.get('stream', True)}", Fore.WHITE)
+            add(f"  Created at: {config.get('created_at', 'Unknown')}", Fore.WHITE)
+            add(f"  Updated at: {config.get('updated_at', 'Unknown')}", Fore.WHITE)
         
         except Exception as e:
-            print_colored(f"Error loading configuration: {e}", Fore.RED)
+            add(f"Error loading configuration: {e}", Fore.RED)
     
     # Display history stats
     history_file = agent_dir / "history.json"
-    if history_file.exists():
+    history_log = agent_dir / "history.jsonl"
+    if history_file.exists() or history_log.exists():
         try:
-            with open(history_file) as f:
-                history = json.load(f)
+            file_size = sum(f.stat().st_size for f in (history_file, history_log) if f.exists())
             
-            user_msgs = len([m for m in history if m.get("role") == "user"])
-            assistant_msgs = len([m for m in history if m.get("role") == "assistant"])
-            total_chars = sum(len(m.get("content", "")) for m in history)
+            # Single pass over the messages for every figure
+            total_msgs = user_msgs = assistant_msgs = total_chars = 0
+            first_ts = last_ts = None
+            for m in _iter_history(history_file, history_log):
+                role = m.get("role")
+                if role == "user":
+                    user_msgs += 1
+                elif role == "assistant":
+                    assistant_msgs += 1
+                total_chars += len(m.get("content", ""))
+                if total_msgs == 0:
+                    first_ts = m['timestamp']
+                last_ts = m['timestamp']
+                total_msgs += 1
             
-            print_colored(f"\nConversation History:", Fore.GREEN)
-            print_colored(f"  Total messages: {len(history)}", Fore.WHITE)
-            print_colored(f"  User messages: {user_msgs}", Fore.WHITE)
-            print_colored(f"  Assistant messages: {assistant_msgs}", Fore.WHITE)
-            print_colored(f"  Total characters: {total_chars:,}", Fore.WHITE)
-            print_colored(f"  File size: {history_file.stat().st_size:,} bytes", Fore.WHITE)
+            add(f"\nConversation History:", Fore.GREEN)
+            add(f"  Total messages: {total_msgs}", Fore.WHITE)
+            add(f"  User messages: {user_msgs}", Fore.WHITE)
+            add(f"  Assistant messages: {assistant_msgs}", Fore.WHITE)
+            add(f"  Total characters: {total_chars:,}", Fore.WHITE)
+            add(f"  File size: {file_size:,} bytes", Fore.WHITE)
             
-            if history:
-                first_msg = datetime.fromisoformat(history[0]["timestamp"])
-                last_msg = datetime.fromisoformat(history[-1]["timestamp"])
-                print_colored(f"  First message: {first_msg.strftime('%Y-%m-%d %H:%M:%S')}", Fore.WHITE)
-                print_colored(f"  Last message: {last_msg.strftime('%Y-%m-%d %H:%M:%S')}", Fore.WHITE)
+            if total_msgs:
+                add(f"  First message: {format_timestamp(first_ts)}", Fore.WHITE)
+                add(f"  Last message: {format_timestamp(last_ts)}", Fore.WHITE)
         
         except Exception as e:
-            print_colored(f"Error loading history: {e}", Fore.RED)
+            add(f"Error loading history: {e}", Fore.RED)
     else:
-        print_colored(f"\nNo conversation history found", Fore.YELLOW)
+        add(f"\nNo conversation history found", Fore.YELLOW)
     
     # Display directory structure
-    print_colored(f"\nDirectory Structure:", Fore.GREEN)
+    add(f"\nDirectory Structure:", Fore.GREEN)
     for item in sorted(agent_dir.rglob("*")):
         if item.is_file():
             size = item.stat().st_size
             size_str = f"{size:,}" if size < 1024 else f"{size/1024:.1f}K"
             rel_path = item.relative_to(agent_dir)
-            print_colored(f"  {rel_path} ({size_str} bytes)", Fore.WHITE)
+            add(f"  {rel_path} ({size_str} bytes)", Fore.WHITE)
+    
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
 
 def format_file_size(size_bytes: int) -> str:
     """Format file size in human readable format"""
-    if size_bytes < 1024:
+    # Every 10 bits is one 1024x unit step
+    unit = min(max(size_bytes.bit_length() - 1, 0) // 10, len(_SIZE_UNITS) - 1)
+    if not unit:
         return f"{size_bytes} B"
-    elif size_bytes < 1024 * 1024:
-        return f"{size_bytes/1024:.1f} KB"
-    elif size_bytes < 1024 * 1024 * 1024:
-        return f"{size_bytes/(1024*1024):.1f} MB"
-    else:
-        return f"{size_bytes/(1024*1024*1024):.1f} GB"
+    return f"{size_bytes / _SIZE_DIVISORS[unit]:.1f} {_SIZE_UNITS[unit]}"
 
 def truncate_string(text: str, max_length: int = 100) -> str:
     """Truncate string with ellipsis if too long"""